@@ -0,0 +1,51 @@
+"""Small in-process caches for hot request paths."""
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class TTLCache:
+    """A bounded mapping whose entries expire after a number of seconds.
+
+    When full, the oldest entry is evicted to make room for a new one.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        return value
+
+    def set(self, key: Any, value: Any, ttl: float | None = None) -> None:
+        """Cache a value, optionally with a shorter lifetime than the default."""
+        self._data.pop(key, None)
+        while len(self._data) >= self.maxsize:
+            self._data.popitem(last=False)
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + lifetime, value)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """Remove a key and return its value (expired or not)."""
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
@@ -1,7 +1,8 @@
 """Application configuration using pydantic-settings."""
 
-from functools import lru_cache
+from functools import cached_property
 
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +13,7 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         extra="ignore",
+        frozen=True,
     )
 
     # Mylar3 settings
@@ -28,12 +30,17 @@ class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:///./data/pulllist.db"
     secret_key: str = "change-this-to-a-random-string"
     app_url: str = "http://localhost:8282"
+    debug: bool = False  # Reload templates from disk when they change
+    force_secure_cookies: bool = False  # Always mark auth cookies Secure (e.g. behind a TLS proxy)
 
     # JWT settings
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24  # 24 hours
     magic_link_expire_minutes: int = 15
 
+    # Password hashing
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31)  # Each step doubles the work per hash
+
     # SMTP settings (for magic link emails)
     smtp_host: str = ""
     smtp_port: int = 587
@@ -53,25 +60,27 @@ class Settings(BaseSettings):
     # Notification settings
     notification_email: str = ""  # Email to send pull-list notifications to
 
-    @property
+    @cached_property
     def komga_auth(self) -> tuple[str, str] | None:
         """Return Komga basic auth tuple if credentials are set."""
         if self.komga_username and self.komga_password:
             return (self.komga_username, self.komga_password)
         return None
 
-    @property
+    @cached_property
     def smtp_configured(self) -> bool:
         """Return True if SMTP is configured for magic link emails."""
         return bool(self.smtp_host and self.smtp_from_email)
 
-    @property
+    @cached_property
     def notifications_enabled(self) -> bool:
         """Return True if pull-list notifications are enabled."""
         return self.smtp_configured and bool(self.notification_email)
 
 
-@lru_cache
+_settings = Settings()
+
+
 def get_settings() -> Settings:
-    """Get cached settings instance."""
-    return Settings()
+    """Get the shared settings instance."""
+    return _settings
@@ -2,22 +2,35 @@
 
 from pathlib import Path
 
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import get_settings
 
 settings = get_settings()
 
-# Ensure data directory exists
-db_path = settings.database_url.replace("sqlite+aiosqlite:///", "")
-if db_path.startswith("./"):
-    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+# A local SQLite file can't go stale, so pooled connections are used as-is
+# without pre-ping or recycling
+engine_options: dict = {
+    "echo": False,
+    "future": True,
+}
+if settings.database_url.startswith("sqlite"):
+    engine_options["connect_args"] = {"check_same_thread": False}
+
+engine = create_async_engine(settings.database_url, **engine_options)
+
+if settings.database_url.startswith("sqlite") and ":memory:" not in settings.database_url:
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers aren't blocked by the scheduler's writes."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    future=True,
-)
 
 async_session = async_sessionmaker(
     engine,
@@ -36,5 +49,11 @@ async def init_db():
     """Initialize database tables."""
     from app.models import Base
 
+    # Ensure data directory exists (file-backed SQLite only)
+    if settings.database_url.startswith("sqlite"):
+        db_path = make_url(settings.database_url).database
+        if db_path and db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
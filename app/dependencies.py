@@ -1,11 +1,16 @@
-"""FastAPI dependencies for authentication and authorization."""
+"""FastAPI dependencies for authentication, authorization and shared clients."""
 
-from fastapi import Depends, HTTPException, Request, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, Request, status
 
-from app.database import get_db
+from app.database import async_session
 from app.models import User
-from app.services.auth import decode_access_token, get_user_by_id, get_user_count
+from app.services.auth import (
+    any_users_exist,
+    decode_access_token,
+    get_cached_user_by_id,
+)
+from app.services.komga import KomgaClient
+from app.services.mylar import MylarClient
 
 
 class AuthenticationRequiredError(Exception):
@@ -20,69 +25,85 @@ class SetupRequiredError(Exception):
     pass
 
 
-async def get_current_user(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-) -> User:
+# Auth failures always send the same headers, so share the header dicts
+_HX_LOGIN_HEADERS = {"HX-Redirect": "/login"}
+_LOGIN_HEADERS = {"Location": "/login"}
+_SETUP_HEADERS = {"Location": "/setup"}
+
+# Set once the first user has been created. The app has no user deletion path,
+# so after that the setup check in get_current_user can skip the database.
+_users_exist = False
+
+
+def _unauth(is_htmx: bool) -> HTTPException:
+    """Return the not-authenticated response for an HTMX or full-page request."""
+    if is_htmx:
+        return HTTPException(status.HTTP_401_UNAUTHORIZED, headers=_HX_LOGIN_HEADERS)
+    return HTTPException(status.HTTP_307_TEMPORARY_REDIRECT, headers=_LOGIN_HEADERS)
+
+
+def mark_users_exist() -> None:
+    """Record that setup is complete so later checks can skip the user count."""
+    global _users_exist
+    _users_exist = True
+
+
+async def users_exist() -> bool:
+    """Return True if setup is complete.
+
+    Only queries the database until the first user has been seen; after that
+    the answer is served from the module flag.
+    """
+    if not _users_exist:
+        async with async_session() as db:
+            if not await any_users_exist(db):
+                return False
+        mark_users_exist()
+    return True
+
+
+def _payload_user_id(payload: dict) -> int | None:
+    """Return the user ID from a token payload, or None if the subject is malformed."""
+    sub = payload.get("sub")
+    if isinstance(sub, str) and sub.isdigit():
+        return int(sub)
+    return None
+
+
+async def get_current_user(request: Request) -> User:
     """Get the current authenticated user from JWT cookie.
 
-    Raises HTTPException with redirect to login if not authenticated.
+    Raises HTTPException with redirect to login if not authenticated. A database
+    session is only opened when a lookup is actually needed, so anonymous
+    requests are redirected without touching the connection pool.
     """
+    # For HTMX requests, auth failures return 401 with an HX-Redirect header
+    is_htmx = "hx-request" in request.headers
+
     # Check if any users exist - if not, redirect to setup
-    user_count = await get_user_count(db)
-    if user_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
-            headers={"Location": "/setup"},
-        )
+    if not await users_exist():
+        raise HTTPException(status.HTTP_307_TEMPORARY_REDIRECT, headers=_SETUP_HEADERS)
 
     token = request.cookies.get("access_token")
     if not token:
-        # For HTMX requests, return 401 with HX-Redirect header
-        if request.headers.get("HX-Request"):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                headers={"HX-Redirect": "/login"},
-            )
-        raise HTTPException(
-            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
-            headers={"Location": "/login"},
-        )
+        raise _unauth(is_htmx)
 
     payload = decode_access_token(token)
-    if not payload:
+    user_id = _payload_user_id(payload) if payload else None
+    if user_id is None:
         # Invalid or expired token
-        if request.headers.get("HX-Request"):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                headers={"HX-Redirect": "/login"},
-            )
-        raise HTTPException(
-            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
-            headers={"Location": "/login"},
-        )
-
-    user_id = int(payload.get("sub", 0))
-    user = await get_user_by_id(db, user_id)
+        raise _unauth(is_htmx)
+
+    async with async_session() as db:
+        user = await get_cached_user_by_id(db, user_id)
 
     if not user or not user.is_active:
-        if request.headers.get("HX-Request"):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                headers={"HX-Redirect": "/login"},
-            )
-        raise HTTPException(
-            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
-            headers={"Location": "/login"},
-        )
+        raise _unauth(is_htmx)
 
     return user
 
 
-async def get_current_user_optional(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-) -> User | None:
+async def get_current_user_optional(request: Request) -> User | None:
     """Get the current user if authenticated, or None if not.
 
     Does not raise exceptions - useful for pages that work with or without auth.
@@ -92,11 +113,12 @@ async def get_current_user_optional(
         return None
 
     payload = decode_access_token(token)
-    if not payload:
+    user_id = _payload_user_id(payload) if payload else None
+    if user_id is None:
         return None
 
-    user_id = int(payload.get("sub", 0))
-    user = await get_user_by_id(db, user_id)
+    async with async_session() as db:
+        user = await get_cached_user_by_id(db, user_id)
 
     if not user or not user.is_active:
         return None
@@ -104,17 +126,21 @@ async def get_current_user_optional(
     return user
 
 
-async def require_no_users(
-    db: AsyncSession = Depends(get_db),
-) -> bool:
+async def require_no_users() -> bool:
     """Dependency that ensures no users exist (for setup page).
 
     Raises HTTPException redirect to login if users exist.
     """
-    user_count = await get_user_count(db)
-    if user_count > 0:
-        raise HTTPException(
-            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
-            headers={"Location": "/login"},
-        )
+    if await users_exist():
+        raise HTTPException(status.HTTP_307_TEMPORARY_REDIRECT, headers=_LOGIN_HEADERS)
     return True
+
+
+def get_komga(request: Request) -> KomgaClient:
+    """Get the application-wide Komga client opened in the lifespan handler."""
+    return request.app.state.komga
+
+
+def get_mylar(request: Request) -> MylarClient:
+    """Get the application-wide Mylar client opened in the lifespan handler."""
+    return request.app.state.mylar
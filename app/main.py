@@ -1,20 +1,40 @@
 """FastAPI application for the pull-list dashboard."""
 
+import asyncio
+import hashlib
 import logging
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import Depends, FastAPI, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse, Response
+import httpx
+from fastapi import BackgroundTasks, Depends, FastAPI, Form, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    select_autoescape,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
+from app.cache import TTLCache
 from app.config import get_settings
-from app.database import get_db, init_db
-from app.dependencies import get_current_user, get_current_user_optional
+from app.database import async_session, get_db, init_db
+from app.dependencies import (
+    get_current_user,
+    get_current_user_optional,
+    get_komga,
+    get_mylar,
+    mark_users_exist,
+    users_exist,
+)
 from app.migrations import run_migrations
-from app.models import User
+from app.models import User, WeeklyBook
 from app.scheduler import (
     get_next_run_time,
     setup_scheduler,
@@ -27,12 +47,12 @@ from app.services.auth import (
     create_magic_link_token,
     create_user,
     get_user_by_email,
-    get_user_count,
+    peek_magic_link_token,
     update_user_password,
     verify_magic_link_token,
 )
 from app.services.email import send_magic_link_email, send_password_reset_email
-from app.services.komga import KomgaClient
+from app.services.komga import KomgaBook, KomgaClient
 from app.services.mylar import MylarClient
 from app.services.pulllist import (
     PullListService,
@@ -57,16 +77,31 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Wednesday application")
     await init_db()
 
+    # Compile every template up front so first renders don't pay for parsing,
+    # keeping the partials for render_partial (except in debug, for auto-reload)
+    for name in templates_env.list_templates():
+        template = templates_env.get_template(name)
+        if not settings.debug and name.startswith("partials/"):
+            _partials[name] = template
+
     # Run database migrations
-    async for db in get_db():
+    async with async_session() as db:
         await run_migrations(db)
-        break
+
+    # Prime the setup-complete flag so login and setup pages skip the query
+    await users_exist()
 
     setup_scheduler()
     start_scheduler()
-    yield
+
+    # Shared API clients so requests reuse pooled connections
+    async with KomgaClient() as komga, MylarClient() as mylar:
+        app.state.komga = komga
+        app.state.mylar = mylar
+        yield
+
     # Shutdown
-    shutdown_scheduler()
+    await shutdown_scheduler()
     logger.info("Wednesday application stopped")
 
 
@@ -82,47 +117,184 @@ static_path = Path(__file__).parent.parent / "static"
 static_path.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 
-# Setup templates
+settings = get_settings()
+
+# Setup templates. Compiled templates are kept for the life of the process and
+# only re-checked on disk in debug mode; the bytecode cache speeds up restarts.
 templates_path = Path(__file__).parent / "templates"
-templates = Jinja2Templates(directory=templates_path)
+templates_env = Environment(
+    loader=FileSystemLoader(templates_path),
+    autoescape=select_autoescape(),
+    auto_reload=settings.debug,
+    cache_size=-1,
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+templates = Jinja2Templates(env=templates_env)
 
-settings = get_settings()
+# HTMX partials are rendered on nearly every interaction, so hold on to their
+# compiled templates directly. Filled at startup by the lifespan handler; left
+# empty in debug mode to keep auto-reload.
+_partials: dict[str, Template] = {}
+
+
+def render_partial(name: str, context: dict) -> HTMLResponse:
+    """Render an HTMX partial template to an HTML response."""
+    template = _partials.get(name) or templates_env.get_template(name)
+    return HTMLResponse(template.render(context))
 
 
 # Template context helpers
-def get_base_context(request: Request, user: User | None = None) -> dict:
-    """Get base context for templates."""
+_KOMGA_URL = settings.komga_url
+_THUMB_PREFIX = "/api/proxy/book/"
+
+# Context entries that are fixed for the life of the process
+_BASE_CONTEXT = {
+    "komga_url": _KOMGA_URL,
+    "smtp_configured": settings.smtp_configured,
+}
+
+
+async def get_base_context(request: Request, user: User = Depends(get_current_user)) -> dict:
+    """Build the base template context for an authenticated page.
+
+    Used as a dependency, so it also enforces authentication. Each request
+    gets a fresh copy that the route can extend.
+    """
+    context = _BASE_CONTEXT.copy()
+    context["request"] = request
+    context["user"] = user
+    context["week_id"] = get_current_week_id()
+    context["next_run"] = get_next_run_time()
+    return context
+
+
+def _card_item(
+    book_id: str,
+    series_name: str,
+    book_number: str,
+    book_title: str | None,
+    is_read: bool,
+    read_percentage: int,
+    is_one_off: bool = False,
+) -> dict:
+    """Build the template context for a single book card."""
     return {
-        "request": request,
-        "week_id": get_current_week_id(),
-        "next_run": get_next_run_time(),
-        "komga_url": settings.komga_url,
-        "user": user,
-        "smtp_configured": settings.smtp_configured,
+        "series_name": series_name,
+        "book_number": book_number,
+        "book_title": book_title,
+        "is_downloaded": True,
+        "is_read": is_read,
+        "read_percentage": read_percentage,
+        "thumbnail_url": _THUMB_PREFIX + book_id + "/thumbnail",
+        "read_url": _KOMGA_URL + "/book/" + book_id + "/read",
+        "komga_book_id": book_id,
+        "is_one_off": is_one_off,
     }
 
 
+def _book_item(book: WeeklyBook, komga_book: KomgaBook | None) -> dict:
+    """Build a card for a stored weekly book, preferring fresh Komga progress."""
+    return _card_item(
+        book.komga_book_id,
+        book.series_name,
+        book.book_number,
+        book.book_title,
+        komga_book.is_read if komga_book else book.is_read,
+        komga_book.read_percentage if komga_book else 0,
+        book.is_one_off,
+    )
+
+
+# After a failed progress fetch, pages skip Komga for this many seconds rather
+# than stalling on it; a successful /api/status probe clears it early
+_KOMGA_RETRY_AFTER = 30
+_PROGRESS_TIMEOUT = 3.0  # Per book request, not for the whole page
+_komga_retry_at = 0.0
+
+
+async def _fetch_progress(komga: KomgaClient, book_ids: list[str]) -> dict[str, KomgaBook]:
+    """Fetch fresh read progress from Komga, or {} if it's unavailable."""
+    global _komga_retry_at
+    if not book_ids or time.monotonic() < _komga_retry_at:
+        return {}
+    try:
+        return await komga.get_books_by_ids(book_ids, timeout=_PROGRESS_TIMEOUT)
+    except (httpx.TransportError, TimeoutError):
+        # Unreachable, or a single request was too slow. Books that are merely
+        # missing don't raise, and a large week only takes longer overall, so a
+        # healthy Komga never opens the retry window.
+        _komga_retry_at = time.monotonic() + _KOMGA_RETRY_AFTER
+        return {}
+
+
+async def _query(method, *args):
+    """Run a PullListService read in its own session.
+
+    AsyncSession isn't safe for concurrent use, so independent reads that are
+    gathered together each need their own session.
+    """
+    async with async_session() as db:
+        return await method(PullListService(db), *args)
+
+
+# The logs and settings pages are re-read on every visit but rarely change, so
+# their data is cached briefly. Routes that change runs or tracked series clear
+# it; the TTL covers scheduled runs and other workers.
+_page_cache = TTLCache(maxsize=8, ttl=30)
+
+
+async def _cached_query(key: str, method, *args):
+    """Run a PullListService read through _query, caching the result under key."""
+    value = _page_cache.get(key)
+    if value is None:
+        value = await _query(method, *args)
+        _page_cache.set(key, value)
+    return value
+
+
+# Changes on every start so a deploy with new templates never matches an old ETag
+_ETAG_SALT = str(time.time())
+
+
+def _dashboard_etag(context: dict) -> str:
+    """Build a weak ETag from everything the dashboard page displays."""
+    readlist = context["week_readlist"]
+    state = (
+        _ETAG_SALT,
+        context["user"].id,
+        context["week_id"],
+        context["next_run"],
+        context["display_week_id"],
+        context["tracked_count"],
+        context["available_weeks"],
+        readlist.readlist_id if readlist else None,
+        context["pull_list"],
+    )
+    digest = hashlib.blake2b(repr(state).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
     week: str | None = None,
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    komga: KomgaClient = Depends(get_komga),
+    context: dict = Depends(get_base_context),
 ):
     """Main dashboard showing the weekly pull-list."""
-    service = PullListService(db)
-
     # Determine which week to show
     current_week_id = get_current_week_id()
     display_week_id = week if week else current_week_id
     is_current_week = display_week_id == current_week_id
 
-    # Get tracked series and week data
-    tracked_series = await service.get_tracked_series()
-    weekly_books = await service.get_week_books(display_week_id)
-    available_weeks = await service.get_available_weeks()
-    week_readlist = await service.get_readlist_for_week(display_week_id)
+    # Get tracked series count and week data (independent reads, run concurrently)
+    tracked_count, weekly_books, available_weeks, week_readlist = await asyncio.gather(
+        _query(PullListService.get_tracked_series_count),
+        _query(PullListService.get_week_books, display_week_id),
+        _query(PullListService.get_available_weeks),
+        _query(PullListService.get_readlist_for_week, display_week_id),
+    )
 
     # Calculate navigation
     prev_week_id = get_previous_week_id(display_week_id)
@@ -136,45 +308,17 @@ async def dashboard(
     if display_week_id >= current_week_id:
         has_next_week = False
 
-    # Fetch fresh read progress from Komga for all books
-    book_ids = [book.komga_book_id for book in weekly_books]
-    komga_books: dict = {}
-    if book_ids:
-        try:
-            async with KomgaClient() as komga:
-                komga_books = await komga.get_books_by_ids(book_ids)
-        except Exception:
-            pass  # Fall back to database values if Komga is unavailable
+    # Fetch fresh read progress from Komga for all books, falling back to
+    # database values if Komga is unavailable
+    komga_books = await _fetch_progress(komga, [book.komga_book_id for book in weekly_books])
 
     # Build pull list items from weekly books
-    pull_list_items = []
-    for book in weekly_books:
-        # Get fresh read progress from Komga if available
-        komga_book = komga_books.get(book.komga_book_id)
-        is_read = komga_book.is_read if komga_book else book.is_read
-        read_percentage = komga_book.read_percentage if komga_book else 0
-
-        pull_list_items.append(
-            {
-                "series_name": book.series_name,
-                "book_number": book.book_number,
-                "book_title": book.book_title,
-                "is_downloaded": True,
-                "is_read": is_read,
-                "read_percentage": read_percentage,
-                "thumbnail_url": f"/api/proxy/book/{book.komga_book_id}/thumbnail",
-                "read_url": f"{settings.komga_url}/book/{book.komga_book_id}/read",
-                "komga_book_id": book.komga_book_id,
-                "is_one_off": book.is_one_off,
-            }
-        )
+    pull_list_items = [_book_item(b, komga_books.get(b.komga_book_id)) for b in weekly_books]
 
-    context = get_base_context(request, user)
     context.update(
         {
             "pull_list": pull_list_items,
-            "tracked_series": tracked_series,
-            "tracked_count": len(tracked_series),
+            "tracked_count": tracked_count,
             "books_count": len(pull_list_items),
             # Week navigation
             "display_week_id": display_week_id,
@@ -187,14 +331,21 @@ async def dashboard(
         }
     )
 
-    return templates.TemplateResponse("dashboard.html", context)
+    # Read progress lives in Komga, so the page is revalidated on every visit,
+    # but an unchanged page is answered with a 304 instead of a re-render
+    etag = _dashboard_etag(context)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return templates.TemplateResponse("dashboard.html", context, headers=headers)
 
 
 @app.post("/api/run-now", response_class=HTMLResponse)
 async def run_now(
-    request: Request,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    komga: KomgaClient = Depends(get_komga),
+    context: dict = Depends(get_base_context),
 ):
     """Manually trigger pull-list generation."""
     service = PullListService(db)
@@ -204,6 +355,7 @@ async def run_now(
         days_back=7,
         create_readlist=True,
     )
+    _page_cache.clear()
 
     # Fetch current week's books from database (same as dashboard)
     # This ensures we only show books for the current week, not all books
@@ -212,38 +364,11 @@ async def run_now(
     weekly_books = await service.get_week_books(current_week_id)
 
     # Fetch fresh read progress from Komga
-    book_ids = [book.komga_book_id for book in weekly_books]
-    komga_books: dict = {}
-    if book_ids:
-        try:
-            async with KomgaClient() as komga:
-                komga_books = await komga.get_books_by_ids(book_ids)
-        except Exception:
-            pass
+    komga_books = await _fetch_progress(komga, [book.komga_book_id for book in weekly_books])
 
     # Build response items from database (consistent with dashboard)
-    pull_list_items = []
-    for book in weekly_books:
-        komga_book = komga_books.get(book.komga_book_id)
-        is_read = komga_book.is_read if komga_book else book.is_read
-        read_percentage = komga_book.read_percentage if komga_book else 0
-
-        pull_list_items.append(
-            {
-                "series_name": book.series_name,
-                "book_number": book.book_number,
-                "book_title": book.book_title,
-                "is_downloaded": True,
-                "is_read": is_read,
-                "read_percentage": read_percentage,
-                "thumbnail_url": f"/api/proxy/book/{book.komga_book_id}/thumbnail",
-                "read_url": f"{settings.komga_url}/book/{book.komga_book_id}/read",
-                "komga_book_id": book.komga_book_id,
-                "is_one_off": book.is_one_off,
-            }
-        )
+    pull_list_items = [_book_item(b, komga_books.get(b.komga_book_id)) for b in weekly_books]
 
-    context = get_base_context(request, user)
     context.update(
         {
             "pull_list": pull_list_items,
@@ -253,20 +378,16 @@ async def run_now(
         }
     )
 
-    return templates.TemplateResponse("partials/pull_list_grid.html", context)
+    return render_partial("partials/pull_list_grid.html", context)
 
 
 @app.get("/logs", response_class=HTMLResponse)
 async def logs_page(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    context: dict = Depends(get_base_context),
 ):
     """Logs page showing run history."""
-    service = PullListService(db)
-    recent_runs = await service.get_recent_runs(limit=50)
+    recent_runs = await _cached_query("recent_runs", PullListService.get_recent_runs, 50)
 
-    context = get_base_context(request, user)
     context.update(
         {
             "recent_runs": recent_runs,
@@ -278,15 +399,13 @@ async def logs_page(
 
 @app.get("/settings", response_class=HTMLResponse)
 async def settings_page(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    context: dict = Depends(get_base_context),
 ):
     """Settings page for managing tracked series."""
-    service = PullListService(db)
-    tracked_series = await service.get_tracked_series(active_only=False)
+    tracked_series = await _cached_query(
+        "tracked_series", PullListService.get_tracked_series, False
+    )
 
-    context = get_base_context(request, user)
     context.update(
         {
             "tracked_series": tracked_series,
@@ -299,21 +418,19 @@ async def settings_page(
 
 @app.post("/api/series/search", response_class=HTMLResponse)
 async def search_series(
-    request: Request,
     query: str = Form(...),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    komga: KomgaClient = Depends(get_komga),
+    context: dict = Depends(get_base_context),
 ):
     """Search Komga for series to add."""
-    async with KomgaClient() as komga:
-        series_list = await komga.get_series(search=query)
-
-    # Get already tracked series IDs
+    # Search Komga and get already tracked series IDs concurrently
     service = PullListService(db)
-    tracked_series = await service.get_tracked_series(active_only=False)
-    tracked_ids = {s.komga_series_id for s in tracked_series}
+    series_list, tracked_ids = await asyncio.gather(
+        komga.get_series(search=query),
+        service.get_tracked_komga_ids(active_only=False),
+    )
 
-    context = get_base_context(request, user)
     context.update(
         {
             "search_results": series_list,
@@ -322,19 +439,18 @@ async def search_series(
         }
     )
 
-    return templates.TemplateResponse("partials/series_search_results.html", context)
+    return render_partial("partials/series_search_results.html", context)
 
 
 @app.post("/api/series/add", response_class=HTMLResponse)
 async def add_series(
-    request: Request,
     komga_series_id: str = Form(...),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    komga: KomgaClient = Depends(get_komga),
+    context: dict = Depends(get_base_context),
 ):
     """Add a series to tracking."""
-    async with KomgaClient() as komga:
-        series = await komga.get_series_by_id(komga_series_id)
+    series = await komga.get_series_by_id(komga_series_id)
 
     service = PullListService(db)
     await service.add_tracked_series(
@@ -342,88 +458,84 @@ async def add_series(
         komga_series_id=series.id,
         publisher=series.publisher,
     )
+    _page_cache.clear()
 
     # Return updated tracked series list
     tracked_series = await service.get_tracked_series(active_only=False)
 
-    context = get_base_context(request, user)
     context.update(
         {
             "tracked_series": tracked_series,
         }
     )
 
-    return templates.TemplateResponse("partials/tracked_series_list.html", context)
+    return render_partial("partials/tracked_series_list.html", context)
 
 
 @app.post("/api/series/{series_id}/toggle", response_class=HTMLResponse)
 async def toggle_series(
-    request: Request,
     series_id: int,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    context: dict = Depends(get_base_context),
 ):
     """Toggle a series active status."""
     service = PullListService(db)
     await service.toggle_tracked_series(series_id)
+    _page_cache.clear()
 
     tracked_series = await service.get_tracked_series(active_only=False)
 
-    context = get_base_context(request, user)
     context.update(
         {
             "tracked_series": tracked_series,
         }
     )
 
-    return templates.TemplateResponse("partials/tracked_series_list.html", context)
+    return render_partial("partials/tracked_series_list.html", context)
 
 
 @app.delete("/api/series/{series_id}", response_class=HTMLResponse)
 async def delete_series(
-    request: Request,
     series_id: int,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    context: dict = Depends(get_base_context),
 ):
     """Remove a series from tracking."""
     service = PullListService(db)
     await service.remove_tracked_series(series_id)
+    _page_cache.clear()
 
     tracked_series = await service.get_tracked_series(active_only=False)
 
-    context = get_base_context(request, user)
     context.update(
         {
             "tracked_series": tracked_series,
         }
     )
 
-    return templates.TemplateResponse("partials/tracked_series_list.html", context)
+    return render_partial("partials/tracked_series_list.html", context)
+
+
+async def _probe(client: KomgaClient | MylarClient) -> bool:
+    """Test a client's connection, treating any error as unavailable."""
+    try:
+        return await client.test_connection()
+    except Exception:
+        return False
 
 
 @app.get("/api/status", response_class=HTMLResponse)
 async def get_status(
-    request: Request,
-    user: User = Depends(get_current_user),
+    komga: KomgaClient = Depends(get_komga),
+    mylar: MylarClient = Depends(get_mylar),
+    context: dict = Depends(get_base_context),
 ):
     """Get connection status for Mylar and Komga."""
-    mylar_status = False
-    komga_status = False
-
-    try:
-        async with MylarClient() as mylar:
-            mylar_status = await mylar.test_connection()
-    except Exception:
-        pass
-
-    try:
-        async with KomgaClient() as komga:
-            komga_status = await komga.test_connection()
-    except Exception:
-        pass
+    global _komga_retry_at
+    mylar_status, komga_status = await asyncio.gather(_probe(mylar), _probe(komga))
+    if komga_status:
+        _komga_retry_at = 0.0
 
-    context = get_base_context(request, user)
     context.update(
         {
             "mylar_status": mylar_status,
@@ -431,7 +543,7 @@ async def get_status(
         }
     )
 
-    return templates.TemplateResponse("partials/status_badges.html", context)
+    return render_partial("partials/status_badges.html", context)
 
 
 @app.post("/api/week/{week_id}/clear", response_class=HTMLResponse)
@@ -449,141 +561,181 @@ async def clear_week(
     return RedirectResponse(url="/", status_code=303)
 
 
+_THUMB_CACHE_CONTROL = "public, max-age=86400"
+_CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+# Recently seen thumbnail ETags, so revalidations can be answered without
+# asking Komga again
+_thumb_etags = TTLCache(maxsize=4096, ttl=60)
+
+
+async def _proxy_thumbnail(request: Request, komga: KomgaClient, path: str) -> Response:
+    """Stream a thumbnail from Komga without buffering it in memory.
+
+    The browser's conditional headers are forwarded so a 304 from Komga can
+    be relayed back without any body.
+    """
+    etag = _thumb_etags.get(path)
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(
+            status_code=304,
+            headers={"Cache-Control": _THUMB_CACHE_CONTROL, "ETag": etag},
+        )
+
+    headers = {k: request.headers[k] for k in _CONDITIONAL_HEADERS if k in request.headers}
+
+    try:
+        upstream = await komga._client.send(
+            komga._client.build_request("GET", f"{komga.base_url}{path}", headers=headers),
+            stream=True,
+        )
+    except Exception:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    response_headers = {"Cache-Control": _THUMB_CACHE_CONTROL}
+    if etag := upstream.headers.get("etag"):
+        response_headers["ETag"] = etag
+        _thumb_etags.set(path, etag)
+    if last_modified := upstream.headers.get("last-modified"):
+        response_headers["Last-Modified"] = last_modified
+
+    if upstream.status_code == 304:
+        await upstream.aclose()
+        return Response(status_code=304, headers=response_headers)
+    if not upstream.is_success:
+        await upstream.aclose()
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    return StreamingResponse(
+        upstream.aiter_bytes(65536),
+        media_type=upstream.headers.get("content-type", "image/jpeg"),
+        headers=response_headers,
+        background=BackgroundTask(upstream.aclose),
+    )
+
+
 @app.get("/api/proxy/book/{book_id}/thumbnail")
 async def proxy_book_thumbnail(
+    request: Request,
     book_id: str,
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Proxy book thumbnail from Komga with authentication."""
-    async with KomgaClient() as komga:
-        url = f"/api/v1/books/{book_id}/thumbnail"
-        try:
-            response = await komga._client.get(f"{komga.base_url}{url}")
-            response.raise_for_status()
-            return Response(
-                content=response.content,
-                media_type=response.headers.get("content-type", "image/jpeg"),
-                headers={"Cache-Control": "public, max-age=86400"},
-            )
-        except Exception:
-            raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return await _proxy_thumbnail(request, komga, f"/api/v1/books/{book_id}/thumbnail")
 
 
 @app.get("/api/proxy/series/{series_id}/thumbnail")
 async def proxy_series_thumbnail(
+    request: Request,
     series_id: str,
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Proxy series thumbnail from Komga with authentication."""
-    async with KomgaClient() as komga:
-        url = f"/api/v1/series/{series_id}/thumbnail"
-        try:
-            response = await komga._client.get(f"{komga.base_url}{url}")
-            response.raise_for_status()
-            return Response(
-                content=response.content,
-                media_type=response.headers.get("content-type", "image/jpeg"),
-                headers={"Cache-Control": "public, max-age=86400"},
-            )
-        except Exception:
-            raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return await _proxy_thumbnail(request, komga, f"/api/v1/series/{series_id}/thumbnail")
 
 
 @app.post("/api/book/{book_id}/mark-read", response_class=HTMLResponse)
 async def mark_book_read(
     request: Request,
     book_id: str,
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Mark a book as read in Komga and return updated book card."""
     try:
-        async with KomgaClient() as komga:
-            await komga.mark_book_read(book_id)
-            book = await komga.get_book_by_id(book_id)
+        # Komga returns no body for the update, and the card only needs the
+        # book's metadata, so fetch it alongside the update
+        _, book = await asyncio.gather(
+            komga.mark_book_read(book_id),
+            komga.get_book_by_id(book_id),
+        )
     except Exception as e:
         logger.error(f"Failed to mark book {book_id} as read: {e}")
         raise HTTPException(status_code=500, detail="Failed to mark book as read")
 
     context = {
         "request": request,
-        "item": {
-            "series_name": book.metadata.get("seriesTitle", book.name),
-            "book_number": book.number,
-            "book_title": book.title,
-            "is_downloaded": True,
-            "is_read": True,
-            "read_percentage": 100,
-            "thumbnail_url": f"/api/proxy/book/{book_id}/thumbnail",
-            "read_url": f"{settings.komga_url}/book/{book_id}/read",
-            "komga_book_id": book_id,
-        },
+        "item": _card_item(
+            book_id,
+            book.metadata.get("seriesTitle", book.name),
+            book.number,
+            book.title,
+            is_read=True,
+            read_percentage=100,
+        ),
     }
 
-    return templates.TemplateResponse("partials/book_card.html", context)
+    return render_partial("partials/book_card.html", context)
 
 
 @app.post("/api/book/{book_id}/mark-unread", response_class=HTMLResponse)
 async def mark_book_unread(
     request: Request,
     book_id: str,
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Mark a book as unread in Komga and return updated book card."""
     try:
-        async with KomgaClient() as komga:
-            await komga.mark_book_unread(book_id)
-            book = await komga.get_book_by_id(book_id)
+        # Komga returns no body for the update, and the card only needs the
+        # book's metadata, so fetch it alongside the update
+        _, book = await asyncio.gather(
+            komga.mark_book_unread(book_id),
+            komga.get_book_by_id(book_id),
+        )
     except Exception as e:
         logger.error(f"Failed to mark book {book_id} as unread: {e}")
         raise HTTPException(status_code=500, detail="Failed to mark book as unread")
 
     context = {
         "request": request,
-        "item": {
-            "series_name": book.metadata.get("seriesTitle", book.name),
-            "book_number": book.number,
-            "book_title": book.title,
-            "is_downloaded": True,
-            "is_read": False,
-            "read_percentage": 0,
-            "thumbnail_url": f"/api/proxy/book/{book_id}/thumbnail",
-            "read_url": f"{settings.komga_url}/book/{book_id}/read",
-            "komga_book_id": book_id,
-        },
+        "item": _card_item(
+            book_id,
+            book.metadata.get("seriesTitle", book.name),
+            book.number,
+            book.title,
+            is_read=False,
+            read_percentage=0,
+        ),
     }
 
-    return templates.TemplateResponse("partials/book_card.html", context)
+    return render_partial("partials/book_card.html", context)
 
 
 @app.get("/api/book/{book_id}/download")
 async def download_book(
     book_id: str,
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Download a book file from Komga."""
     try:
-        async with KomgaClient() as komga:
-            content, filename, media_type = await komga.get_book_file(book_id)
+        upstream, filename, media_type = await komga.stream_book_file(book_id)
     except Exception as e:
         logger.error(f"Failed to download book {book_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to download book")
 
-    return Response(
-        content=content,
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    # The body is relayed decoded, so the length only holds if it wasn't compressed
+    content_length = upstream.headers.get("content-length")
+    if content_length and "content-encoding" not in upstream.headers:
+        headers["Content-Length"] = content_length
+
+    return StreamingResponse(
+        upstream.aiter_bytes(65536),
         media_type=media_type,
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Length": str(len(content)),
-        },
+        headers=headers,
+        background=BackgroundTask(upstream.aclose),
     )
 
 
 @app.get("/api/week/{week_id}/available-books", response_class=HTMLResponse)
 async def get_available_books(
-    request: Request,
     week_id: str,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    context: dict = Depends(get_base_context),
 ):
     """Get all available books for a week (for one-off browsing)."""
     logger.info(f"Fetching available books for week {week_id}")
@@ -599,31 +751,27 @@ async def get_available_books(
         added_book_ids = {wb.komga_book_id for wb in weekly_books}
 
         # Get tracked series
-        tracked_series = await service.get_tracked_series()
-        tracked_series_ids = {s.komga_series_id for s in tracked_series}
-
-        # Build book list
-        book_items = []
-        for book in available_books:
-            book_items.append(
-                {
-                    "komga_book_id": book.id,
-                    "komga_series_id": book.series_id,
-                    "series_name": book.metadata.get("seriesTitle", book.name),
-                    "book_number": book.number,
-                    "thumbnail_url": f"/api/proxy/book/{book.id}/thumbnail",
-                    "is_issue_added": book.id in added_book_ids,
-                    "is_series_tracked": book.series_id in tracked_series_ids,
-                    "is_read": book.is_read,
-                }
-            )
-
-        book_items.sort(key=lambda x: (x["series_name"], x["book_number"]))
-
-        context = get_base_context(request, user)
+        tracked_series_ids = await service.get_tracked_komga_ids()
+
+        # Build book list, sorted by series then issue number
+        available_books.sort(key=lambda b: (b.metadata.get("seriesTitle", b.name), b.number))
+        book_items = [
+            {
+                "komga_book_id": book.id,
+                "komga_series_id": book.series_id,
+                "series_name": book.metadata.get("seriesTitle", book.name),
+                "book_number": book.number,
+                "thumbnail_url": _THUMB_PREFIX + book.id + "/thumbnail",
+                "is_issue_added": book.id in added_book_ids,
+                "is_series_tracked": book.series_id in tracked_series_ids,
+                "is_read": book.is_read,
+            }
+            for book in available_books
+        ]
+
         context.update({"books": book_items, "week_id": week_id})
 
-        return templates.TemplateResponse("partials/available_books_grid.html", context)
+        return render_partial("partials/available_books_grid.html", context)
     except Exception as e:
         logger.error(f"Error fetching available books: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -634,22 +782,21 @@ async def add_series_from_book(
     request: Request,
     book_id: str,
     db: AsyncSession = Depends(get_db),
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Add a series to tracking from a book in the browse view."""
     service = PullListService(db)
 
     try:
-        async with KomgaClient() as komga:
-            book = await komga.get_book_by_id(book_id)
-            series = await komga.get_series_by_id(book.series_id)
+        book = await komga.get_book_by_id(book_id)
+        series = await komga.get_series_by_id(book.series_id)
 
         # Check if already tracked
-        existing = await service.get_tracked_series()
-        if any(s.komga_series_id == series.id for s in existing):
+        if series.id in await service.get_tracked_komga_ids():
             # Already tracked
             context = {"request": request, "series_id": series.id, "is_tracked": True}
-            return templates.TemplateResponse("partials/add_series_button.html", context)
+            return render_partial("partials/add_series_button.html", context)
 
         # Add series to tracking
         await service.add_tracked_series(
@@ -657,9 +804,10 @@ async def add_series_from_book(
             komga_series_id=series.id,
             publisher=series.publisher,
         )
+        _page_cache.clear()
 
         context = {"request": request, "series_id": series.id, "is_tracked": True}
-        return templates.TemplateResponse("partials/add_series_button.html", context)
+        return render_partial("partials/add_series_button.html", context)
     except Exception as e:
         logger.error(f"Error adding series from book {book_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -682,7 +830,7 @@ async def add_one_off_book_endpoint(
         raise HTTPException(status_code=400, detail=str(e))
 
     context = {"request": request, "book_id": book_id, "week_id": week_id, "is_added": True}
-    return templates.TemplateResponse("partials/add_issue_button.html", context)
+    return render_partial("partials/add_issue_button.html", context)
 
 
 @app.post("/api/book/{book_id}/promote-to-tracked", response_class=HTMLResponse)
@@ -690,6 +838,7 @@ async def promote_one_off_endpoint(
     request: Request,
     book_id: str,
     db: AsyncSession = Depends(get_db),
+    komga: KomgaClient = Depends(get_komga),
     user: User = Depends(get_current_user),
 ):
     """Promote a one-off book to a tracked series."""
@@ -700,31 +849,31 @@ async def promote_one_off_endpoint(
         await service.promote_one_off_to_tracked(current_week_id, book_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    _page_cache.clear()
 
     # Fetch updated book data
-    async with KomgaClient() as komga:
-        book = await komga.get_book_by_id(book_id)
-
-    weekly_books = await service.get_week_books(current_week_id)
-    weekly_book = next(wb for wb in weekly_books if wb.komga_book_id == book_id)
+    book, weekly_book = await asyncio.gather(
+        komga.get_book_by_id(book_id),
+        service.get_week_book(current_week_id, book_id),
+    )
+    if weekly_book is None:
+        # Removed from this week between the promotion and the re-read
+        raise HTTPException(status_code=404, detail="Book not found in this week")
 
     context = {
         "request": request,
-        "item": {
-            "series_name": weekly_book.series_name,
-            "book_number": book.number,
-            "book_title": book.title,
-            "is_downloaded": True,
-            "is_read": book.is_read,
-            "read_percentage": book.read_percentage,
-            "thumbnail_url": f"/api/proxy/book/{book_id}/thumbnail",
-            "read_url": f"{settings.komga_url}/book/{book_id}/read",
-            "komga_book_id": book_id,
-            "is_one_off": weekly_book.is_one_off,
-        },
+        "item": _card_item(
+            book_id,
+            weekly_book.series_name,
+            book.number,
+            book.title,
+            book.is_read,
+            book.read_percentage,
+            weekly_book.is_one_off,
+        ),
     }
 
-    return templates.TemplateResponse("partials/book_card.html", context)
+    return render_partial("partials/book_card.html", context)
 
 
 @app.delete("/api/book/{book_id}/remove-one-off", response_class=HTMLResponse)
@@ -747,10 +896,13 @@ async def remove_one_off_endpoint(
     return ""
 
 
+_HEALTHY_BODY = b'{"status":"healthy"}'
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
+    return Response(content=_HEALTHY_BODY, media_type="application/json")
 
 
 # =============================================================================
@@ -758,27 +910,53 @@ async def health_check():
 # =============================================================================
 
 
+_COOKIE_MAX_AGE = settings.access_token_expire_minutes * 60
+_FORCE_SECURE_COOKIES = settings.force_secure_cookies
+
+
+def _set_auth_cookie(response: Response, access_token: str, scheme: str) -> None:
+    """Attach the access token cookie to a response.
+
+    Behind a TLS-terminating proxy the request scheme is plain http, so
+    FORCE_SECURE_COOKIES can mark the cookie Secure regardless.
+    """
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        secure=_FORCE_SECURE_COOKIES or scheme == "https",
+        samesite="lax",
+        max_age=_COOKIE_MAX_AGE,
+    )
+
+
+# The plain login page only depends on settings, so it is rendered once (except
+# in debug mode, where template edits should show up)
+_login_html: bytes | None = None
+
+
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(
     request: Request,
-    db: AsyncSession = Depends(get_db),
     user: User | None = Depends(get_current_user_optional),
 ):
     """Login page."""
+    global _login_html
     # If already logged in, redirect to dashboard
     if user:
         return RedirectResponse(url="/", status_code=303)
 
     # If no users exist, redirect to setup
-    user_count = await get_user_count(db)
-    if user_count == 0:
+    if not await users_exist():
         return RedirectResponse(url="/setup", status_code=303)
 
-    context = {
-        "request": request,
-        "smtp_configured": settings.smtp_configured,
-    }
-    return templates.TemplateResponse("login.html", context)
+    if _login_html is None or settings.debug:
+        context = {
+            "request": request,
+            "smtp_configured": settings.smtp_configured,
+        }
+        _login_html = templates_env.get_template("login.html").render(context).encode()
+    return HTMLResponse(_login_html)
 
 
 @app.post("/api/auth/login")
@@ -809,20 +987,14 @@ async def login(
 
     # Set cookie and redirect
     response = RedirectResponse(url="/", status_code=303)
-    response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=request.url.scheme == "https",
-        samesite="lax",
-        max_age=settings.access_token_expire_minutes * 60,
-    )
+    _set_auth_cookie(response, access_token, request.url.scheme)
     return response
 
 
 @app.post("/api/auth/magic-link", response_class=HTMLResponse)
 async def request_magic_link(
     request: Request,
+    background_tasks: BackgroundTasks,
     email: str = Form(...),
     db: AsyncSession = Depends(get_db),
 ):
@@ -838,8 +1010,8 @@ async def request_magic_link(
     if user and user.is_active:
         # Create magic link token
         token = await create_magic_link_token(db, user.id)
-        # Send email (fire and forget - we don't wait for success)
-        await send_magic_link_email(email, token)
+        # Send email after the response (fire and forget - we don't wait for success)
+        background_tasks.add_task(send_magic_link_email, email, token)
 
     return templates.TemplateResponse("login.html", context)
 
@@ -867,14 +1039,7 @@ async def verify_magic_link(
 
     # Set cookie and redirect
     response = RedirectResponse(url="/", status_code=303)
-    response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=request.url.scheme == "https",
-        samesite="lax",
-        max_age=settings.access_token_expire_minutes * 60,
-    )
+    _set_auth_cookie(response, access_token, request.url.scheme)
     return response
 
 
@@ -887,14 +1052,10 @@ async def logout(request: Request):
 
 
 @app.get("/setup", response_class=HTMLResponse)
-async def setup_page(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-):
+async def setup_page(request: Request):
     """Initial setup page - create first user."""
     # If users exist, redirect to login
-    user_count = await get_user_count(db)
-    if user_count > 0:
+    if await users_exist():
         return RedirectResponse(url="/login", status_code=303)
 
     context = {"request": request}
@@ -911,8 +1072,7 @@ async def setup_create_user(
 ):
     """Create the initial user during setup."""
     # Check if users already exist
-    user_count = await get_user_count(db)
-    if user_count > 0:
+    if await users_exist():
         return RedirectResponse(url="/login", status_code=303)
 
     # Basic validation
@@ -932,19 +1092,13 @@ async def setup_create_user(
 
     # Create user
     user = await create_user(db, username, email, password)
+    mark_users_exist()
 
     # Log them in
     access_token = create_access_token(user.id)
 
     response = RedirectResponse(url="/", status_code=303)
-    response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=request.url.scheme == "https",
-        samesite="lax",
-        max_age=settings.access_token_expire_minutes * 60,
-    )
+    _set_auth_cookie(response, access_token, request.url.scheme)
     return response
 
 
@@ -962,6 +1116,7 @@ async def forgot_password_page(request: Request):
 @app.post("/api/auth/forgot-password", response_class=HTMLResponse)
 async def forgot_password(
     request: Request,
+    background_tasks: BackgroundTasks,
     email: str = Form(...),
     db: AsyncSession = Depends(get_db),
 ):
@@ -976,7 +1131,7 @@ async def forgot_password(
     if user and user.is_active:
         # Create magic link token (reuse for password reset)
         token = await create_magic_link_token(db, user.id)
-        await send_password_reset_email(email, token)
+        background_tasks.add_task(send_password_reset_email, email, token)
 
     return templates.TemplateResponse("forgot_password.html", context)
 
@@ -989,15 +1144,7 @@ async def reset_password_page(
 ):
     """Password reset form page."""
     # Verify token is valid (but don't consume it yet)
-    from sqlalchemy import select
-
-    from app.models import MagicLinkToken
-    from app.services.auth import utcnow
-
-    result = await db.execute(select(MagicLinkToken).where(MagicLinkToken.token == token))
-    magic_token = result.scalar_one_or_none()
-
-    if not magic_token or magic_token.used_at or magic_token.expires_at < utcnow():
+    if await peek_magic_link_token(db, token) is None:
         context = {
             "request": request,
             "error": "Invalid or expired reset link. Please request a new one.",
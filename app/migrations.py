@@ -7,22 +7,33 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+# Bump this when adding a migration so already-migrated databases skip the checks.
+SCHEMA_VERSION = 3
+
 
 async def run_migrations(db: AsyncSession) -> None:
     """Run all pending database migrations."""
-    await add_tracked_series_id_column(db)
-    await add_is_one_off_column(db)
+    version = (await db.execute(text("PRAGMA user_version"))).scalar_one()
+    if version >= SCHEMA_VERSION:
+        logger.info(f"Database schema is at version {version}, skipping migrations")
+        return
+
+    result = await db.execute(text("PRAGMA table_info(weekly_books)"))
+    columns = {col[1] for col in result.fetchall()}
+
+    await add_tracked_series_id_column(db, columns)
+    await add_is_one_off_column(db, columns)
+    await add_indexes(db)
+
+    # PRAGMA does not accept bound parameters; SCHEMA_VERSION is a trusted int.
+    await db.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION:d}"))
+    await db.commit()
 
 
-async def add_tracked_series_id_column(db: AsyncSession) -> None:
+async def add_tracked_series_id_column(db: AsyncSession, columns: set[str]) -> None:
     """Add tracked_series_id column to weekly_books table if it doesn't exist."""
     try:
-        # Check if column exists
-        result = await db.execute(text("PRAGMA table_info(weekly_books)"))
-        columns = result.fetchall()
-        column_names = [col[1] for col in columns]
-
-        if "tracked_series_id" not in column_names:
+        if "tracked_series_id" not in columns:
             logger.info("Adding tracked_series_id column to weekly_books table...")
             await db.execute(
                 text(
@@ -43,17 +54,10 @@ async def add_tracked_series_id_column(db: AsyncSession) -> None:
         raise
 
 
-async def add_is_one_off_column(db: AsyncSession) -> None:
+async def add_is_one_off_column(db: AsyncSession, columns: set[str]) -> None:
     """Add is_one_off column to weekly_books table and populate it."""
     try:
-        # Check if column exists
-        result = await db.execute(text("PRAGMA table_info(weekly_books)"))
-        columns = result.fetchall()
-        column_names = [col[1] for col in columns]
-
-        column_exists = "is_one_off" in column_names
-
-        if not column_exists:
+        if "is_one_off" not in columns:
             logger.info("Adding is_one_off column to weekly_books table...")
             await db.execute(
                 text(
@@ -71,3 +75,25 @@ async def add_is_one_off_column(db: AsyncSession) -> None:
         logger.error(f"Migration failed: {e}")
         await db.rollback()
         raise
+
+
+async def add_indexes(db: AsyncSession) -> None:
+    """Bring existing databases' indexes in line with the models."""
+    try:
+        for statement in (
+            # Redundant: a prefix of both composite weekly_books indexes
+            "DROP INDEX IF EXISTS ix_weekly_books_week_id",
+            "CREATE INDEX IF NOT EXISTS ix_weekly_books_week_book "
+            "ON weekly_books (week_id, komga_book_id)",
+            "CREATE INDEX IF NOT EXISTS ix_weekly_books_week_tracked "
+            "ON weekly_books (week_id, tracked_series_id)",
+            "CREATE INDEX IF NOT EXISTS ix_magic_link_tokens_expires_at "
+            "ON magic_link_tokens (expires_at)",
+        ):
+            await db.execute(text(statement))
+        await db.commit()
+        logger.info("Updated weekly_books and magic_link_tokens indexes")
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        await db.rollback()
+        raise
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -78,11 +78,17 @@ class WeeklyBook(Base):
     """A book included in a weekly pull-list."""
 
     __tablename__ = "weekly_books"
+    __table_args__ = (
+        # Per-week lookups by book, and the tracked/one-off splits within a week
+        Index("ix_weekly_books_week_book", "week_id", "komga_book_id"),
+        Index("ix_weekly_books_week_tracked", "week_id", "tracked_series_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
     # Week identification (ISO week format: 2024-W48)
-    week_id: Mapped[str] = mapped_column(String(10), nullable=False, index=True)
+    # Indexed through the composite indexes above, which both lead with week_id
+    week_id: Mapped[str] = mapped_column(String(10), nullable=False)
 
     # Book info from Komga
     komga_book_id: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -147,9 +153,10 @@ class MagicLinkToken(Base):
     __tablename__ = "magic_link_tokens"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # HMAC-SHA256 hex digest of the emailed token, never the token itself
     token: Mapped[str] = mapped_column(String(64), unique=True, index=True, nullable=False)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     used_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
@@ -1,12 +1,15 @@
 """APScheduler setup for automated pull-list generation."""
 
+import asyncio
 import logging
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import TTLCache
 from app.config import get_settings
 from app.database import async_session
 from app.models import NotificationLog
@@ -17,18 +20,70 @@ logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+# get_next_run_time is rendered on every page, so keep its result briefly
+_next_run_cache = TTLCache(maxsize=1, ttl=5)
+_MISSING = object()
 
-async def was_notification_sent_for_week(db: AsyncSession, week_id: str) -> bool:
-    """Check if a notification was already sent for the given week."""
-    result = await db.execute(select(NotificationLog).where(NotificationLog.week_id == week_id))
-    return result.scalar_one_or_none() is not None
+# Weeks already claimed for notification, so later runs in the same week skip
+# the insert. Cleared for a week if its email fails and the claim is released.
+_notified_weeks = TTLCache(maxsize=8, ttl=14 * 24 * 60 * 60)
 
+# Notification emails in flight; the event loop only keeps weak references
+_notify_tasks: set[asyncio.Task] = set()
 
-async def record_notification_sent(db: AsyncSession, week_id: str, items_count: int) -> None:
-    """Record that a notification was sent for the given week."""
-    log_entry = NotificationLog(week_id=week_id, items_count=items_count)
-    db.add(log_entry)
+# Seconds shutdown waits for notification emails before cancelling them
+_NOTIFY_SHUTDOWN_TIMEOUT = 10
+
+
+async def claim_notification_week(db: AsyncSession, week_id: str, items_count: int) -> bool:
+    """Record a week's notification, returning False if it was already recorded.
+
+    The insert is atomic, so overlapping runs can't both claim the same week.
+    """
+    if week_id in _notified_weeks:
+        return False
+    result = await db.execute(
+        sqlite_insert(NotificationLog)
+        .values(week_id=week_id, items_count=items_count)
+        .on_conflict_do_nothing(index_elements=[NotificationLog.week_id])
+        .returning(NotificationLog.id)
+    )
+    claimed = result.scalar() is not None
+    await db.commit()
+    _notified_weeks.set(week_id, True)
+    return claimed
+
+
+async def release_notification_week(db: AsyncSession, week_id: str) -> None:
+    """Drop a week's notification record so a later run retries the email."""
+    await db.execute(delete(NotificationLog).where(NotificationLog.week_id == week_id))
     await db.commit()
+    _notified_weeks.pop(week_id)
+
+
+async def _notify(week_id: str, items: list[tuple[str, str]]) -> None:
+    """Send the pull-list email for a claimed week, releasing the claim on failure."""
+    email_sent = False
+    try:
+        email_sent = await send_pulllist_notification_email(
+            week_id=week_id,
+            items_count=len(items),
+            items=items,
+        )
+    except Exception as e:
+        logger.exception(f"Error sending pull-list notification: {e}")
+    finally:
+        # Also runs when the task is cancelled at shutdown, so an unsent week
+        # is never left marked as notified
+        if not email_sent:
+            try:
+                async with async_session() as db:
+                    await release_notification_week(db, week_id)
+            except Exception as e:
+                logger.exception(f"Error releasing notification claim for week {week_id}: {e}")
+
+    if email_sent:
+        logger.info(f"Notification sent for week {week_id}")
 
 
 async def scheduled_pulllist_job():
@@ -51,21 +106,13 @@ async def scheduled_pulllist_job():
                 )
 
                 # Send notification email if items were found and we haven't notified yet
-                if len(result.items) > 0:
-                    already_notified = await was_notification_sent_for_week(db, result.week_id)
-                    if not already_notified:
-                        items_data = [
-                            {"series_name": item.series_name, "book_number": item.book_number}
-                            for item in result.items
-                        ]
-                        email_sent = await send_pulllist_notification_email(
-                            week_id=result.week_id,
-                            items_count=len(result.items),
-                            items=items_data,
-                        )
-                        if email_sent:
-                            await record_notification_sent(db, result.week_id, len(result.items))
-                            logger.info(f"Notification sent for week {result.week_id}")
+                if len(result.items) > 0 and get_settings().notifications_enabled:
+                    claimed = await claim_notification_week(db, result.week_id, len(result.items))
+                    if claimed:
+                        items_data = [(item.series_name, item.book_number) for item in result.items]
+                        task = asyncio.create_task(_notify(result.week_id, items_data))
+                        _notify_tasks.add(task)
+                        task.add_done_callback(_notify_tasks.discard)
                     else:
                         logger.debug(
                             f"Notification already sent for week {result.week_id}, skipping"
@@ -97,6 +144,7 @@ def setup_scheduler():
         name="Wednesday Generation",
         replace_existing=True,
     )
+    _next_run_cache.clear()
 
     day_desc = "daily" if settings.schedule_day_of_week == "*" else settings.schedule_day_of_week
     logger.info(
@@ -110,19 +158,32 @@ def start_scheduler():
     """Start the scheduler."""
     if not scheduler.running:
         scheduler.start()
+        _next_run_cache.clear()
         logger.info("Scheduler started")
 
 
-def shutdown_scheduler():
-    """Shutdown the scheduler."""
+async def shutdown_scheduler():
+    """Shutdown the scheduler, giving in-flight notification emails a chance to finish."""
     if scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("Scheduler stopped")
 
+    if _notify_tasks:
+        tasks = list(_notify_tasks)
+        _, pending = await asyncio.wait(tasks, timeout=_NOTIFY_SHUTDOWN_TIMEOUT)
+        # Cancelled sends release their week's claim so the next run retries
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
 
 def get_next_run_time() -> str | None:
     """Get the next scheduled run time as a formatted string."""
-    job = scheduler.get_job("pulllist_job")
-    if job and job.next_run_time:
-        return job.next_run_time.strftime("%Y-%m-%d %H:%M:%S %Z")
-    return None
+    next_run = _next_run_cache.get("next_run", _MISSING)
+    if next_run is _MISSING:
+        job = scheduler.get_job("pulllist_job")
+        next_run = None
+        if job and job.next_run_time:
+            next_run = job.next_run_time.strftime("%Y-%m-%d %H:%M:%S %Z")
+        _next_run_cache.set("next_run", next_run)
+    return next_run
@@ -1,18 +1,46 @@
 """Authentication service for user management and JWT tokens."""
 
+import asyncio
+import hashlib
+import hmac
 import secrets
+import time
 from datetime import UTC, datetime, timedelta
 
 import bcrypt
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import TTLCache
 from app.config import get_settings
 from app.models import MagicLinkToken, User
 
 settings = get_settings()
 
+# bcrypt cost factor for new hashes. Stored hashes with a different cost are
+# rehashed on the next successful login.
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+
+# Key for the magic link token digests stored in the database
+_TOKEN_KEY = settings.secret_key.encode("utf-8")
+
+# Recently loaded users by ID, so authenticated requests can skip the lookup
+_user_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Verified access-token payloads, keyed by the raw token, so repeat requests
+# skip signature verification
+_token_cache = TTLCache(maxsize=4096, ttl=30)
+
+# Digests of magic link tokens already found used, expired or unknown. Tokens
+# are single-use, so replays can be rejected without a database lookup.
+_rejected_magic_links = TTLCache(maxsize=1024, ttl=settings.magic_link_expire_minutes * 60)
+
+# User lookups, built once so each call only binds its parameter
+_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
 
 def utcnow() -> datetime:
     """Get current UTC time as naive datetime (for SQLite compatibility)."""
@@ -21,20 +49,47 @@ def utcnow() -> datetime:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hash."""
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"),
-        hashed_password.encode("utf-8"),
-    )
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode("utf-8"),
+            hashed_password.encode("utf-8"),
+        )
+    except ValueError:
+        # Over bcrypt's 72-byte limit, so it can't match any stored hash
+        return False
 
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     return bcrypt.hashpw(
         password.encode("utf-8"),
-        bcrypt.gensalt(),
+        bcrypt.gensalt(rounds=BCRYPT_ROUNDS),
     ).decode("utf-8")
 
 
+# Checked against when a login names an unknown user
+_DUMMY_HASH = hash_password(secrets.token_urlsafe(16))
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Return True if a bcrypt hash wasn't made with the current cost factor."""
+    # bcrypt hashes look like $2b$12$..., with the cost in the third field
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in a worker thread so the event loop isn't blocked."""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in a worker thread so the event loop isn't blocked."""
+    return await asyncio.to_thread(hash_password, password)
+
+
 def create_access_token(user_id: int, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     if expires_delta:
@@ -52,42 +107,67 @@ def create_access_token(user_id: int, expires_delta: timedelta | None = None) ->
 
 def decode_access_token(token: str) -> dict | None:
     """Decode and validate a JWT access token. Returns payload or None if invalid."""
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
-        if payload.get("type") != "access":
-            return None
-        return payload
     except JWTError:
         return None
+    if payload.get("type") != "access":
+        return None
+    # Never serve a cached payload past the token's own expiry
+    _token_cache.set(token, payload, ttl=payload["exp"] - time.time())
+    return payload
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     """Get a user by ID."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_USER_BY_ID, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
+async def get_cached_user_by_id(db: AsyncSession, user_id: int) -> User | None:
+    """Get a user by ID, reusing a recently loaded instance when possible."""
+    user = _user_cache.get(user_id)
+    if user is None:
+        user = await get_user_by_id(db, user_id)
+        if user is not None:
+            _user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Drop a user from the cache after it has been modified."""
+    _user_cache.pop(user_id)
+
+
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     """Get a user by username."""
-    result = await db.execute(select(User).where(User.username == username))
+    result = await db.execute(_USER_BY_USERNAME, {"username": username})
     return result.scalar_one_or_none()
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Get a user by email."""
-    result = await db.execute(select(User).where(User.email == email))
+    result = await db.execute(_USER_BY_EMAIL, {"email": email})
     return result.scalar_one_or_none()
 
 
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> User | None:
     """Authenticate a user by username and password."""
     user = await get_user_by_username(db, username)
-    if not user:
-        return None
-    if not verify_password(password, user.password_hash):
+    # Unknown usernames still pay for one bcrypt check, so response time
+    # doesn't reveal which accounts exist
+    hashed = user.password_hash if user else _DUMMY_HASH
+    if not await verify_password_async(password, hashed) or not user:
         return None
     if not user.is_active:
         return None
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(password)
+        await db.commit()
+        invalidate_cached_user(user.id)
     return user
 
 
@@ -98,21 +178,40 @@ async def create_user(
     password: str,
 ) -> User:
     """Create a new user."""
-    user = User(
-        username=username,
-        email=email,
-        password_hash=hash_password(password),
+    # RETURNING loads the server-side defaults without a refresh query
+    result = await db.execute(
+        insert(User)
+        .values(
+            username=username,
+            email=email,
+            password_hash=await hash_password_async(password),
+        )
+        .returning(User)
     )
-    db.add(user)
+    user = result.scalar_one()
     await db.commit()
-    await db.refresh(user)
     return user
 
 
 async def get_user_count(db: AsyncSession) -> int:
     """Get the total number of users."""
-    result = await db.execute(select(User))
-    return len(result.scalars().all())
+    result = await db.execute(select(func.count()).select_from(User))
+    return result.scalar_one()
+
+
+async def any_users_exist(db: AsyncSession) -> bool:
+    """Return True if at least one user exists."""
+    result = await db.execute(select(1).select_from(User).limit(1))
+    return result.scalar() is not None
+
+
+def hash_magic_link_token(token: str) -> str:
+    """Return the keyed digest of a magic link token, as stored in the database.
+
+    Only the digest is persisted, so a leaked database doesn't expose usable
+    links.
+    """
+    return hmac.new(_TOKEN_KEY, token.encode("utf-8"), hashlib.sha256).hexdigest()
 
 
 async def create_magic_link_token(db: AsyncSession, user_id: int) -> str:
@@ -125,7 +224,7 @@ async def create_magic_link_token(db: AsyncSession, user_id: int) -> str:
 
     # Store in database
     magic_token = MagicLinkToken(
-        token=token,
+        token=hash_magic_link_token(token),
         user_id=user_id,
         expires_at=expires_at,
     )
@@ -135,28 +234,53 @@ async def create_magic_link_token(db: AsyncSession, user_id: int) -> str:
     return token
 
 
-async def verify_magic_link_token(db: AsyncSession, token: str) -> User | None:
-    """Verify a magic link token and return the user if valid."""
-    result = await db.execute(select(MagicLinkToken).where(MagicLinkToken.token == token))
-    magic_token = result.scalar_one_or_none()
-
-    if not magic_token:
+async def peek_magic_link_token(db: AsyncSession, token: str) -> User | None:
+    """Return the user for a valid magic link token without consuming it."""
+    digest = hash_magic_link_token(token)
+    if digest in _rejected_magic_links:
         return None
 
-    # Check if already used
-    if magic_token.used_at is not None:
-        return None
+    result = await db.execute(
+        select(User)
+        .join(MagicLinkToken, MagicLinkToken.user_id == User.id)
+        .where(
+            MagicLinkToken.token == digest,
+            MagicLinkToken.used_at.is_(None),
+            MagicLinkToken.expires_at >= utcnow(),
+            User.is_active.is_(True),
+        )
+    )
+    return result.scalar_one_or_none()
 
-    # Check if expired
-    if magic_token.expires_at < utcnow():
+
+async def verify_magic_link_token(db: AsyncSession, token: str) -> User | None:
+    """Verify a magic link token and return the user if valid."""
+    digest = hash_magic_link_token(token)
+    if digest in _rejected_magic_links:
         return None
 
-    # Mark as used
-    magic_token.used_at = utcnow()
+    # Consume the token in one statement, so two concurrent requests can't
+    # both pass the unused/unexpired check
+    now = utcnow()
+    result = await db.execute(
+        update(MagicLinkToken)
+        .where(
+            MagicLinkToken.token == digest,
+            MagicLinkToken.used_at.is_(None),
+            MagicLinkToken.expires_at >= now,
+        )
+        .values(used_at=now)
+        .returning(MagicLinkToken.user_id)
+    )
+    user_id = result.scalar_one_or_none()
     await db.commit()
+    _rejected_magic_links.set(digest, True)
+
+    if user_id is None:
+        return None
 
-    # Get the user
-    user = await get_user_by_id(db, magic_token.user_id)
+    # Same lookup the auth dependency uses, so a warm user skips the query
+    user = await get_cached_user_by_id(db, user_id)
     if not user or not user.is_active:
         return None
 
@@ -169,19 +293,14 @@ async def update_user_password(db: AsyncSession, user_id: int, new_password: str
     if not user:
         return False
 
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await hash_password_async(new_password)
     await db.commit()
+    invalidate_cached_user(user_id)
     return True
 
 
 async def cleanup_expired_tokens(db: AsyncSession) -> int:
     """Delete expired magic link tokens. Returns count of deleted tokens."""
-    result = await db.execute(select(MagicLinkToken).where(MagicLinkToken.expires_at < utcnow()))
-    expired_tokens = result.scalars().all()
-    count = len(expired_tokens)
-
-    for token in expired_tokens:
-        await db.delete(token)
-
+    result = await db.execute(delete(MagicLinkToken).where(MagicLinkToken.expires_at < utcnow()))
     await db.commit()
-    return count
+    return result.rowcount
@@ -221,14 +221,14 @@ If you didn't request a password reset, you can safely ignore this email.
 async def send_pulllist_notification_email(
     week_id: str,
     items_count: int,
-    items: list[dict] | None = None,
+    items: list[tuple[str, str]] | None = None,
 ) -> bool:
     """Send a pull-list notification email.
 
     Args:
         week_id: The week ID (e.g., "2024-W48")
         items_count: Number of issues found
-        items: Optional list of dicts with series_name and book_number
+        items: Optional list of (series_name, book_number) tuples
 
     Returns True if email was sent successfully, False otherwise.
     """
@@ -242,11 +242,17 @@ async def send_pulllist_notification_email(
     items_html = ""
     items_text = ""
     if items:
-        items_html = "<ul style='margin: 10px 0; padding-left: 20px;'>"
-        for item in items:
-            items_html += f"<li style='margin: 5px 0;'><strong>{item['series_name']}</strong> #{item['book_number']}</li>"
-            items_text += f"  - {item['series_name']} #{item['book_number']}\n"
-        items_html += "</ul>"
+        items_html = (
+            "<ul style='margin: 10px 0; padding-left: 20px;'>"
+            + "".join(
+                f"<li style='margin: 5px 0;'><strong>{series_name}</strong> #{book_number}</li>"
+                for series_name, book_number in items
+            )
+            + "</ul>"
+        )
+        items_text = "".join(
+            f"  - {series_name} #{book_number}\n" for series_name, book_number in items
+        )
 
     # Create message
     message = MIMEMultipart("alternative")
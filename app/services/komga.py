@@ -1,5 +1,7 @@
 """Komga API client."""
 
+import asyncio
+import re
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
@@ -8,6 +10,20 @@ import httpx
 
 from app.config import get_settings
 
+# Upper bound on concurrent per-book requests made by get_books_by_ids
+MAX_CONCURRENT_BOOK_FETCHES = 10
+
+# Filename in a Content-Disposition header (quoted or unquoted)
+_FILENAME_RE = re.compile(r'filename[*]?=["\']?([^"\';\n]+)["\']?')
+
+
+def _filename_from_disposition(content_disposition: str, default: str = "book.cbz") -> str:
+    """Extract the filename from a Content-Disposition header value."""
+    match = _FILENAME_RE.search(content_disposition)
+    if match:
+        return match.group(1).strip()
+    return default
+
 
 @dataclass
 class KomgaSeries:
@@ -105,6 +121,7 @@ class KomgaClient:
             timeout=30.0,
             headers=headers,
             auth=auth,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
         )
         return self
 
@@ -211,14 +228,28 @@ class KomgaClient:
         data = await self._get(f"/api/v1/books/{book_id}")
         return self._parse_book(data)
 
-    async def get_books_by_ids(self, book_ids: list[str]) -> dict[str, KomgaBook]:
-        """Get multiple books by IDs. Returns a dict mapping book_id to KomgaBook."""
-        import asyncio
+    async def get_books_by_ids(
+        self,
+        book_ids: list[str],
+        timeout: float | None = None,
+    ) -> dict[str, KomgaBook]:
+        """Get multiple books by IDs. Returns a dict mapping book_id to KomgaBook.
+
+        Komga has no endpoint for fetching books by a list of IDs, so the
+        books are fetched concurrently, a bounded number at a time. Books that
+        can't be fetched are left out. Connection errors, and any single request
+        taking longer than timeout seconds, are raised, since they mean Komga
+        itself is unreachable or struggling.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BOOK_FETCHES)
 
         async def fetch_book(book_id: str) -> tuple[str, KomgaBook | None]:
             try:
-                book = await self.get_book_by_id(book_id)
+                async with semaphore:
+                    book = await asyncio.wait_for(self.get_book_by_id(book_id), timeout)
                 return (book_id, book)
+            except (httpx.TransportError, TimeoutError):
+                raise
             except Exception:
                 return (book_id, None)
 
@@ -365,32 +396,26 @@ class KomgaClient:
         """Mark a book as unread by clearing read progress in Komga."""
         await self._delete(f"/api/v1/books/{book_id}/read-progress")
 
-    async def get_book_file(self, book_id: str) -> tuple[bytes, str, str]:
-        """Get the book file content for download.
+    async def stream_book_file(self, book_id: str) -> tuple[httpx.Response, str, str]:
+        """Open a streamed download of a book file.
 
-        Returns a tuple of (content, filename, media_type).
+        Returns a tuple of (response, filename, media_type). The response body
+        has not been read yet: iterate it with aiter_bytes() and close it with
+        aclose() when done.
         """
         if not self._client:
             raise RuntimeError("Client not initialized. Use 'async with' context manager.")
 
         url = f"{self.base_url}/api/v1/books/{book_id}/file"
-        response = await self._client.get(url)
-        response.raise_for_status()
-
-        # Extract filename from Content-Disposition header
-        content_disposition = response.headers.get("content-disposition", "")
-        filename = "book.cbz"
-        if "filename=" in content_disposition:
-            # Parse filename from header (handles both quoted and unquoted)
-            import re
-
-            match = re.search(r'filename[*]?=["\']?([^"\';\n]+)["\']?', content_disposition)
-            if match:
-                filename = match.group(1).strip()
+        response = await self._client.send(self._client.build_request("GET", url), stream=True)
+        if not response.is_success:
+            await response.aclose()
+            response.raise_for_status()
 
+        filename = _filename_from_disposition(response.headers.get("content-disposition", ""))
         media_type = response.headers.get("content-type", "application/octet-stream")
 
-        return response.content, filename, media_type
+        return response, filename, media_type
 
     def _parse_series(self, data: dict[str, Any]) -> KomgaSeries:
         """Parse series data from API response."""
@@ -1,9 +1,10 @@
 """Pull-list generation service."""
 
 from dataclasses import dataclass
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, date, datetime, timedelta
+from functools import lru_cache
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import PullListRun, TrackedSeries, WeeklyBook
@@ -71,9 +72,15 @@ def get_week_id_for_date(dt: datetime) -> str:
     return adjusted.strftime("%G-W%V")
 
 
+@lru_cache(maxsize=8)
+def _week_id_for_day(day: date) -> str:
+    """Get the comic week ID for a calendar day (memoized)."""
+    return get_week_id_for_date(datetime(day.year, day.month, day.day))
+
+
 def get_current_week_id() -> str:
     """Get the comic week ID for the current week."""
-    return get_week_id_for_date(datetime.now())
+    return _week_id_for_day(date.today())
 
 
 def get_week_start_date(week_id: str | None = None) -> datetime:
@@ -90,6 +97,7 @@ def get_week_start_date(week_id: str | None = None) -> datetime:
     return now - timedelta(days=days_since_wednesday)
 
 
+@lru_cache(maxsize=128)
 def get_previous_week_id(week_id: str) -> str:
     """Get the ISO week ID for the previous week."""
     week_start = get_week_start_date(week_id)
@@ -97,6 +105,7 @@ def get_previous_week_id(week_id: str) -> str:
     return prev_week.strftime("%G-W%V")
 
 
+@lru_cache(maxsize=128)
 def get_next_week_id(week_id: str) -> str:
     """Get the ISO week ID for the next week."""
     week_start = get_week_start_date(week_id)
@@ -104,6 +113,7 @@ def get_next_week_id(week_id: str) -> str:
     return next_week.strftime("%G-W%V")
 
 
+@lru_cache(maxsize=128)
 def format_week_display(week_id: str) -> str:
     """Format week ID for display (e.g., 'Nov 26 - Dec 2, 2024').
 
@@ -135,6 +145,24 @@ class PullListService:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
+    async def get_tracked_series_count(self, active_only: bool = True) -> int:
+        """Get the number of tracked series."""
+        query = select(func.count()).select_from(TrackedSeries)
+        if active_only:
+            query = query.where(TrackedSeries.is_active.is_(True))
+
+        result = await self.db.execute(query)
+        return result.scalar_one()
+
+    async def get_tracked_komga_ids(self, active_only: bool = True) -> set[str]:
+        """Get the Komga series IDs of tracked series."""
+        query = select(TrackedSeries.komga_series_id)
+        if active_only:
+            query = query.where(TrackedSeries.is_active.is_(True))
+
+        result = await self.db.execute(query)
+        return set(result.scalars().all())
+
     async def add_tracked_series(
         self,
         name: str,
@@ -441,6 +469,16 @@ class PullListService:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
+    async def get_week_book(self, week_id: str, komga_book_id: str) -> WeeklyBook | None:
+        """Get a single book from a week's pull-list."""
+        result = await self.db.execute(
+            select(WeeklyBook).where(
+                WeeklyBook.week_id == week_id,
+                WeeklyBook.komga_book_id == komga_book_id,
+            )
+        )
+        return result.scalar_one_or_none()
+
     async def get_available_weeks(self) -> list[str]:
         """Get list of weeks that have books, ordered newest first."""
         from sqlalchemy import distinct
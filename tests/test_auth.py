@@ -2,13 +2,18 @@
 
 from datetime import timedelta
 
+import bcrypt
 import pytest
 
 from app.services.auth import (
     create_access_token,
     decode_access_token,
+    hash_magic_link_token,
     hash_password,
+    hash_password_async,
+    password_needs_rehash,
     verify_password,
+    verify_password_async,
 )
 
 
@@ -94,6 +99,30 @@ class TestPasswordHashing:
         with pytest.raises(ValueError, match="password cannot be longer than 72 bytes"):
             hash_password(password)
 
+    def test_verify_password_too_long_is_false(self):
+        """Passwords over 72 bytes fail verification instead of raising."""
+        hashed = hash_password("password")
+        assert verify_password("a" * 100, hashed) is False
+
+    async def test_async_wrappers_round_trip(self):
+        """The async wrappers should hash and verify like the sync functions."""
+        hashed = await hash_password_async("password123")
+        assert await verify_password_async("password123", hashed) is True
+        assert await verify_password_async("wrong", hashed) is False
+
+    def test_needs_rehash_current_cost(self):
+        """Hashes made with the current cost factor don't need rehashing."""
+        assert password_needs_rehash(hash_password("password")) is False
+
+    def test_needs_rehash_other_cost(self):
+        """Hashes made with a different cost factor need rehashing."""
+        hashed = bcrypt.hashpw(b"password", bcrypt.gensalt(rounds=4)).decode("utf-8")
+        assert password_needs_rehash(hashed) is True
+
+    def test_needs_rehash_malformed(self):
+        """Unrecognized hash strings should be treated as needing a rehash."""
+        assert password_needs_rehash("not-a-hash") is True
+
 
 class TestJwtTokens:
     """Tests for JWT token creation and validation."""
@@ -175,6 +204,11 @@ class TestJwtTokens:
         token2 = create_access_token(user_id=2)
         assert token1 != token2
 
+    def test_decode_reuses_verified_payload(self):
+        """A token decoded twice should be served from the cache the second time."""
+        token = create_access_token(user_id=7)
+        assert decode_access_token(token) is decode_access_token(token)
+
     def test_decode_empty_token(self):
         """decode_access_token should handle empty string."""
         payload = decode_access_token("")
@@ -184,3 +218,22 @@ class TestJwtTokens:
         """decode_access_token should handle None-like values."""
         payload = decode_access_token("null")
         assert payload is None
+
+
+class TestMagicLinkTokenDigest:
+    """Tests for the stored form of magic link tokens."""
+
+    def test_digest_is_stable(self):
+        """The same token should always map to the same digest."""
+        assert hash_magic_link_token("abc") == hash_magic_link_token("abc")
+
+    def test_digest_fits_token_column(self):
+        """Digests are 64 hex characters and never the raw token."""
+        digest = hash_magic_link_token("abc")
+        assert len(digest) == 64
+        assert digest != "abc"
+        int(digest, 16)
+
+    def test_different_tokens_different_digests(self):
+        """Different tokens should produce different digests."""
+        assert hash_magic_link_token("abc") != hash_magic_link_token("abd")
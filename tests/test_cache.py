@@ -0,0 +1,63 @@
+"""Tests for the in-process TTL cache."""
+
+from unittest.mock import patch
+
+from app.cache import TTLCache
+
+
+class TestTTLCache:
+    """Tests for TTLCache expiry and eviction."""
+
+    def test_get_missing_returns_default(self):
+        """Missing keys should return the default."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        assert cache.get("missing") is None
+        assert cache.get("missing", "fallback") == "fallback"
+
+    def test_set_and_get(self):
+        """Stored values should be returned before they expire."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        assert "key" in cache
+
+    def test_entries_expire(self):
+        """Entries should not be returned after their TTL."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        with patch("app.cache.time.monotonic", return_value=1000.0):
+            cache.set("key", "value")
+        with patch("app.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_per_entry_ttl_cannot_exceed_default(self):
+        """A per-entry TTL should only ever shorten the lifetime."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        with patch("app.cache.time.monotonic", return_value=1000.0):
+            cache.set("short", "value", ttl=5)
+            cache.set("long", "value", ttl=600)
+        with patch("app.cache.time.monotonic", return_value=1010.0):
+            assert cache.get("short") is None
+            assert cache.get("long") == "value"
+        with patch("app.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("long") is None
+
+    def test_oldest_entry_evicted_when_full(self):
+        """Adding past maxsize should evict the oldest entry."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+    def test_pop_and_clear(self):
+        """pop and clear should remove entries."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -1,8 +1,18 @@
 """Tests for Komga service - data classes and parsing."""
 
+import asyncio
 from datetime import UTC, datetime
 
-from app.services.komga import KomgaBook, KomgaClient, KomgaSeries
+import httpx
+import pytest
+
+from app.services.komga import (
+    MAX_CONCURRENT_BOOK_FETCHES,
+    KomgaBook,
+    KomgaClient,
+    KomgaSeries,
+    _filename_from_disposition,
+)
 
 
 class TestKomgaBookProperties:
@@ -299,3 +309,75 @@ class TestKomgaClientUrlMethods:
         client = KomgaClient(base_url="http://localhost:25600/")
         url = client.get_book_read_url("book-123")
         assert url == "http://localhost:25600/book/book-123/read"
+
+
+class TestFilenameFromDisposition:
+    """Tests for parsing download filenames from Content-Disposition."""
+
+    def test_quoted_filename(self):
+        """Quoted filenames should be returned without the quotes."""
+        header = 'attachment; filename="Batman 001 (2024).cbz"'
+        assert _filename_from_disposition(header) == "Batman 001 (2024).cbz"
+
+    def test_unquoted_filename(self):
+        """Unquoted filenames should stop at the next parameter."""
+        header = "attachment; filename=batman.cbz; size=100"
+        assert _filename_from_disposition(header) == "batman.cbz"
+
+    def test_missing_filename_uses_default(self):
+        """A header without a filename should fall back to the default."""
+        assert _filename_from_disposition("attachment") == "book.cbz"
+
+
+class TestGetBooksByIds:
+    """Tests for KomgaClient.get_books_by_ids."""
+
+    async def test_skips_failed_books_and_bounds_concurrency(self):
+        """Failed lookups are dropped and at most N requests run at once."""
+        client = KomgaClient(base_url="http://localhost:25600")
+        in_flight = 0
+        peak = 0
+
+        async def fake_get_book_by_id(book_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            if book_id == "missing":
+                raise RuntimeError("not found")
+            return book_id
+
+        client.get_book_by_id = fake_get_book_by_id
+        ids = [f"book-{i}" for i in range(MAX_CONCURRENT_BOOK_FETCHES * 3)] + ["missing"]
+
+        books = await client.get_books_by_ids(ids)
+
+        assert set(books) == set(ids) - {"missing"}
+        assert peak <= MAX_CONCURRENT_BOOK_FETCHES
+
+    async def test_raises_when_komga_is_unreachable(self):
+        """Connection errors aren't treated as missing books."""
+        client = KomgaClient(base_url="http://localhost:25600")
+
+        async def fake_get_book_by_id(book_id):
+            raise httpx.ConnectError("All connection attempts failed")
+
+        client.get_book_by_id = fake_get_book_by_id
+
+        with pytest.raises(httpx.ConnectError):
+            await client.get_books_by_ids(["book-1", "book-2"])
+
+    async def test_raises_when_a_request_times_out(self):
+        """A single slow request raises, rather than being dropped as missing."""
+        client = KomgaClient(base_url="http://localhost:25600")
+
+        async def fake_get_book_by_id(book_id):
+            if book_id == "slow":
+                await asyncio.sleep(1)
+            return book_id
+
+        client.get_book_by_id = fake_get_book_by_id
+
+        with pytest.raises(TimeoutError):
+            await client.get_books_by_ids(["book-1", "slow"], timeout=0.01)
@@ -0,0 +1,125 @@
+"""Tests for the scheduler's weekly notification claims, with a mocked session."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app import scheduler
+from app.scheduler import _notify, claim_notification_week, release_notification_week
+
+
+def make_mock_db(*inserted_ids):
+    """Create a mock session whose INSERT ... RETURNING yields the given ids in turn."""
+    db = MagicMock()
+    results = []
+    for inserted_id in inserted_ids:
+        result = MagicMock()
+        result.scalar.return_value = inserted_id
+        results.append(result)
+    db.execute = AsyncMock(side_effect=results or None)
+    db.commit = AsyncMock()
+    return db
+
+
+@pytest.fixture(autouse=True)
+def clear_notified_weeks():
+    """Start each test with no weeks remembered as notified."""
+    scheduler._notified_weeks.clear()
+    yield
+    scheduler._notified_weeks.clear()
+
+
+class TestNotificationClaims:
+    """Tests for claim_notification_week and release_notification_week."""
+
+    async def test_claim_release_reclaim(self):
+        """A week can be claimed once, and again only after it is released."""
+        db = make_mock_db(1, None, 2)
+
+        assert await claim_notification_week(db, "2024-W48", 3) is True
+        # Remembered in-process, so the duplicate claim doesn't touch the database
+        assert await claim_notification_week(db, "2024-W48", 3) is False
+        assert db.execute.await_count == 1
+
+        await release_notification_week(db, "2024-W48")
+        assert db.execute.await_count == 2
+
+        # Once released, the week is claimable again
+        assert await claim_notification_week(db, "2024-W48", 3) is True
+
+    async def test_claim_lost_to_another_run(self):
+        """When the row already exists, the insert returns nothing and the claim fails."""
+        db = make_mock_db(None)
+
+        assert await claim_notification_week(db, "2024-W48", 3) is False
+        db.commit.assert_awaited_once()
+
+
+class TestNotify:
+    """Tests for the background notification task."""
+
+    @pytest.fixture
+    def mock_release(self):
+        """Patch the session factory and the claim release used by _notify."""
+        with (
+            patch.object(scheduler, "async_session", MagicMock()),
+            patch.object(scheduler, "release_notification_week", AsyncMock()) as release,
+        ):
+            yield release
+
+    async def test_sent_keeps_claim(self, mock_release):
+        """A delivered email leaves the week claimed."""
+        with patch.object(
+            scheduler, "send_pulllist_notification_email", AsyncMock(return_value=True)
+        ):
+            await _notify("2024-W48", [("Saga", "1")])
+
+        mock_release.assert_not_awaited()
+
+    async def test_failed_send_releases_claim(self, mock_release):
+        """A failed or raising send releases the claim so a later run retries."""
+        for outcome in (AsyncMock(return_value=False), AsyncMock(side_effect=OSError)):
+            mock_release.reset_mock()
+            with patch.object(scheduler, "send_pulllist_notification_email", outcome):
+                await _notify("2024-W48", [("Saga", "1")])
+
+            mock_release.assert_awaited_once()
+            assert mock_release.await_args.args[1] == "2024-W48"
+
+    async def test_cancelled_send_releases_claim(self, mock_release):
+        """Cancelling the task mid-send (e.g. at shutdown) still releases the claim."""
+        started = asyncio.Event()
+
+        async def slow_send(**kwargs):
+            started.set()
+            await asyncio.sleep(60)
+
+        with patch.object(scheduler, "send_pulllist_notification_email", slow_send):
+            task = asyncio.create_task(_notify("2024-W48", [("Saga", "1")]))
+            await started.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        mock_release.assert_awaited_once()
+
+    async def test_shutdown_cancels_pending_sends(self, mock_release):
+        """Shutdown cancels sends still running after the grace period, releasing them."""
+
+        async def slow_send(**kwargs):
+            await asyncio.sleep(60)
+
+        with (
+            patch.object(scheduler, "send_pulllist_notification_email", slow_send),
+            patch.object(scheduler, "_NOTIFY_SHUTDOWN_TIMEOUT", 0.01),
+        ):
+            task = asyncio.create_task(_notify("2024-W48", [("Saga", "1")]))
+            scheduler._notify_tasks.add(task)
+            task.add_done_callback(scheduler._notify_tasks.discard)
+            await asyncio.sleep(0)
+            await scheduler.shutdown_scheduler()
+
+        assert task.cancelled()
+        assert not scheduler._notify_tasks
+        mock_release.assert_awaited_once()